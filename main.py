@@ -1,39 +1,180 @@
 # main.py
 import subprocess
 import os
+import sys
+import argparse
+import asyncio
+import codecs
+import signal
+import traceback
+from contextlib import redirect_stdout, suppress
 from datetime import datetime
 
-def run_script(script_path, script_name):
-    """Helper function to run a Python script and log its output."""
-    log_dir = os.path.join(os.path.dirname(__file__), 'logs')
+from scripts import collect_metrics, analyze_data
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+class Tee:
+    """Minimal write-only stream that forwards everything to several streams."""
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, data):
+        for stream in self.streams:
+            stream.write(data)
+        return len(data)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
+
+def new_log_file(script_name):
+    """Returns a fresh timestamped log file path for a profiling step."""
+    log_dir = os.path.join(PROJECT_ROOT, 'logs')
     os.makedirs(log_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"{script_name}_{timestamp}.log")
+    return os.path.join(log_dir, f"{script_name}_{timestamp}.log")
+
+def run_module(module, script_name):
+    """Runs a script module's main() in this interpreter and logs its output."""
+    log_file = new_log_file(script_name)
 
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running {script_name}...")
     with open(log_file, 'w') as f:
-        process = subprocess.Popen(['python', script_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        for line in iter(process.stdout.readline, ''):
-            print(line, end='') # Print to console
-            f.write(line)       # Write to log file
+        try:
+            with redirect_stdout(Tee(sys.stdout, f)):
+                module.main()
+        except Exception as e:
+            f.write(traceback.format_exc())
+            print(f"Error: {script_name} failed with {e!r}. Check {log_file} for details.")
+        else:
+            print(f"{script_name} completed successfully. Logs in {log_file}")
+
+def run_script(script_path, script_name):
+    """Helper function to run a Python script and log its output."""
+    log_file = new_log_file(script_name)
+
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running {script_name}...")
+    sys.stdout.flush()
+    with open(log_file, 'wb') as f:
+        process = subprocess.Popen(['python', script_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=1 << 16)
+        # Forward output in whatever blocks are available instead of line by line
+        while True:
+            chunk = process.stdout.read1(1 << 16)
+            if not chunk:
+                break
+            sys.stdout.buffer.write(chunk) # Print to console
+            sys.stdout.buffer.flush()
+            f.write(chunk)                 # Write to log file
         process.wait()
         if process.returncode != 0:
             print(f"Error: {script_name} exited with code {process.returncode}. Check {log_file} for details.")
         else:
             print(f"{script_name} completed successfully. Logs in {log_file}")
 
+async def stream_script(script_path, script_name, processes):
+    """Runs a Python script as an asyncio subprocess and logs its output.
+
+    The started process is appended to processes.
+    """
+    log_file = new_log_file(script_name)
+
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running {script_name}...")
+    # Unbuffered, so prompts such as the collector's countdown show up as they happen
+    process = await asyncio.create_subprocess_exec(
+        'python', '-u', script_path, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True
+    )
+    processes.append(process)
+    prefix = f"[{script_name}] "
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    at_line_start = True
+    with open(log_file, 'wb') as f:
+        # Forward output in whatever blocks are available; a countdown that
+        # rewrites one line with \r can grow past any line length limit
+        while True:
+            chunk = await process.stdout.read(1 << 16)
+            if not chunk:
+                break
+            f.write(chunk)
+            # Prefix console lines so output from concurrent steps stays readable
+            text = decoder.decode(chunk)
+            if not text:
+                continue
+            text = text.replace('\n', '\n' + prefix)
+            if at_line_start:
+                text = prefix + text
+            at_line_start = text.endswith('\n' + prefix)
+            if at_line_start:
+                text = text[:-len(prefix)]
+            print(text, end='', flush=True)
+    returncode = await process.wait()
+    if returncode != 0:
+        print(f"Error: {script_name} exited with code {returncode}. Check {log_file} for details.")
+    else:
+        print(f"{script_name} completed successfully. Logs in {log_file}")
+
+async def run_scripts_concurrently(scripts):
+    """Runs (script_path, script_name) pairs at the same time.
+
+    The scripts run in their own sessions, so Ctrl+C in the terminal only
+    reaches this process. It forwards the interrupt to each script once and
+    keeps logging their output until they exit.
+    """
+    processes = []
+
+    def forward_interrupt():
+        for process in processes:
+            if process.returncode is None:
+                process.send_signal(signal.SIGINT)
+
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, forward_interrupt)
+    except NotImplementedError:
+        pass  # Event loops on Windows don't support signal handlers
+    try:
+        await asyncio.gather(*(stream_script(path, name, processes) for path, name in scripts))
+    finally:
+        with suppress(NotImplementedError):
+            loop.remove_signal_handler(signal.SIGINT)
+        # Don't leave scripts orphaned in their own sessions if streaming failed
+        for process in processes:
+            if process.returncode is None:
+                with suppress(ProcessLookupError):
+                    process.terminate()
+                await process.wait()
+
 def main():
+    parser = argparse.ArgumentParser(description="PostgreSQL performance profiler")
+    parser.add_argument('--subprocess', action='store_true',
+                        help="run each step in a separate Python interpreter")
+    parser.add_argument('--concurrent', action='store_true',
+                        help="collect new metrics while analyzing the latest completed collection")
+    args = parser.parse_args()
+
     print("Starting PostgreSQL Performance Profiling and Baseline Analysis PoC...")
 
     # Define script paths
-    collect_script = os.path.join(os.path.dirname(__file__), 'scripts', 'collect_metrics.py')
-    analyze_script = os.path.join(os.path.dirname(__file__), 'scripts', 'analyze_data.py')
+    collect_script = os.path.join(PROJECT_ROOT, 'scripts', 'collect_metrics.py')
+    analyze_script = os.path.join(PROJECT_ROOT, 'scripts', 'analyze_data.py')
 
-    # Step 1: Collect Metrics
-    run_script(collect_script, "collect_metrics")
+    if args.concurrent:
+        # The analysis does not wait for this run's collection, so it reports
+        # on whatever raw data the previous run left behind
+        asyncio.run(run_scripts_concurrently([
+            (collect_script, "collect_metrics"),
+            (analyze_script, "analyze_data"),
+        ]))
+    elif args.subprocess:
+        run_script(collect_script, "collect_metrics")
+        run_script(analyze_script, "analyze_data")
+    else:
+        # Step 1: Collect Metrics
+        run_module(collect_metrics, "collect_metrics")
 
-    # Step 2: Analyze Data and Generate Report
-    run_script(analyze_script, "analyze_data")
+        # Step 2: Analyze Data and Generate Report
+        run_module(analyze_data, "analyze_data")
 
     print("\nPoC execution completed.")
 
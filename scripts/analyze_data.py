@@ -1,46 +1,126 @@
 # scripts/analyze_data.py
+import numpy as np
 import pandas as pd
 import os
-import glob
 import configparser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import pyarrow  # noqa: F401
+    # Arrow-backed strings let Series.str.contains run on Arrow's string kernels
+    QUERY_TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    QUERY_TEXT_DTYPE = 'object'
+
+# Repository root; data, report and config paths are resolved against it.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Suggestion text for each query pattern, in the column order of the mask matrix
+# built by analyze_query_patterns.
+QUERY_SUGGESTIONS = [
+    "⚠️ **Avoid SELECT ***: Specify columns explicitly to reduce network traffic and improve query plan caching.",
+    "🔍 **Leading Wildcard LIKE**: Using LIKE with a leading wildcard can't use indexes. Consider full-text search or alternative patterns.",
+    "⏱️ **Missing LIMIT with ORDER BY**: Consider adding LIMIT to avoid unnecessary sorting of large result sets.",
+    "🔗 **Implicit JOIN**: Use explicit JOIN syntax with ON clause for better readability and performance.",
+    "🔎 **OR conditions**: OR conditions can prevent index usage. Consider rewriting with UNION ALL.",
+    "🐌 **No WHERE clause**: Full table scans detected. Consider adding appropriate WHERE conditions.",
+]
+
+# Regex patterns matched case-insensitively by contains(), so the query
+# column never has to be upper-cased. The keywords contain no regex
+# metacharacters and serve as their own patterns.
+SELECT_STAR_PATTERN = r'SELECT\s+\*'
+LIKE_WILDCARD_PATTERN = r"LIKE\s+['\"]%.*%['\"]"
+QUERY_KEYWORDS = ('ORDER BY', 'LIMIT', 'JOIN', 'ON', 'OR', 'INDEX', 'UNION', 'WHERE')
+
+# File name prefixes of the raw metric CSVs written by the collector, with the
+# pd.read_csv options for each: only the columns the report uses, explicit
+# dtypes (categorical for low-cardinality columns), and dates parsed at read
+# time.
+RAW_READ_OPTIONS = {
+    'query_stats_': {
+        'usecols': ['query', 'calls', 'total_ms', 'avg_ms', 'min_ms', 'max_ms'],
+        'dtype': {'query': QUERY_TEXT_DTYPE, 'calls': 'int64', 'total_ms': 'float64', 'avg_ms': 'float64', 'min_ms': 'float64', 'max_ms': 'float64'},
+    },
+    'table_sizes_': {},
+    'db_stats_': {},
+    'bgwriter_stats_': {},
+    'connection_info_': {'parse_dates': ['query_start'], 'dtype': {'state': 'category'}},
+    'lock_info_': {'dtype': {'granted': 'bool'}},
+}
+
+# Keeps text inside a single markdown table cell: line breaks become spaces and
+# pipes are escaped
+MARKDOWN_CELL_TRANS = str.maketrans({'|': '\\|', '\n': ' ', '\r': ' '})
+
+def truncate_text(series, max_len):
+    """Truncate strings longer than max_len, appending '...' to the cut ones."""
+    return series.mask(series.str.len() > max_len, series.str.slice(0, max_len) + '...')
+
+def to_markdown_table(df, floatfmt='.2f'):
+    """Render a DataFrame as an unpadded markdown table, one column at a time."""
+    float_format = ('{:' + floatfmt + '}').format
+    cells = []
+    align = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_float_dtype(values):
+            cells.append(values.map(float_format))
+        else:
+            cells.append(values.astype(str).str.translate(MARKDOWN_CELL_TRANS))
+        align.append('---:' if pd.api.types.is_numeric_dtype(values) else ':---')
+
+    header = '| ' + ' | '.join(map(str, df.columns)) + ' |\n|' + '|'.join(align) + '|'
+    if df.empty:
+        return header
+    rows = '| ' + cells[0]
+    for column_cells in cells[1:]:
+        rows = rows + ' | ' + column_cells
+    rows = rows + ' |'
+    return header + '\n' + '\n'.join(rows)
+
+def contains(series, pattern):
+    """Return a boolean mask of rows matching a regex pattern, ignoring case."""
+    # Plain pattern strings, since pyarrow string columns cannot hand compiled
+    # pattern objects to Arrow's regex kernel
+    return series.str.contains(pattern, case=False, na=False)
+
 def analyze_query_patterns(df_queries):
     """Analyze query patterns and generate optimization suggestions."""
     suggestions = []
     
-    for _, row in df_queries.iterrows():
-        query = row['query']
-        analysis = []
-        
-        # Check for common performance issues
-        if 'SELECT *' in query.upper():
-            analysis.append("⚠️ **Avoid SELECT ***: Specify columns explicitly to reduce network traffic and improve query plan caching.")
-            
-        if 'LIKE "%term%"' in query or "LIKE '%term%'" in query:
-            analysis.append("🔍 **Leading Wildcard LIKE**: Using LIKE with a leading wildcard can't use indexes. Consider full-text search or alternative patterns.")
-            
-        if 'ORDER BY' in query.upper() and 'LIMIT' not in query.upper() and row['calls'] > 10:
-            analysis.append("⏱️ **Missing LIMIT with ORDER BY**: Consider adding LIMIT to avoid unnecessary sorting of large result sets.")
-            
-        if 'JOIN' in query.upper() and 'ON' not in query.upper():
-            analysis.append("🔗 **Implicit JOIN**: Use explicit JOIN syntax with ON clause for better readability and performance.")
-            
-        if 'OR' in query.upper() and 'INDEX' not in query.upper() and 'UNION' not in query.upper():
-            analysis.append("🔎 **OR conditions**: OR conditions can prevent index usage. Consider rewriting with UNION ALL.")
-            
-        if row['avg_ms'] > 100 and 'WHERE' not in query.upper() and 'JOIN' not in query.upper() and 'calls' in row and row['calls'] > 10:
-            analysis.append("🐌 **No WHERE clause**: Full table scans detected. Consider adding appropriate WHERE conditions.")
-            
-        if analysis:
-            # Truncate long queries for better readability
-            truncated_query = query[:200] + ('...' if len(query) > 200 else '')
-            suggestions.append({
-                'query': truncated_query,
-                'calls': row.get('calls', 'N/A'),
-                'avg_ms': f"{row.get('avg_ms', 'N/A'):.2f}",
-                'suggestions': '\n'.join(f"  - {s}" for s in analysis)
-            })
+    queries = df_queries['query']
+    has = {
+        keyword: contains(queries, keyword)
+        for keyword in QUERY_KEYWORDS
+    }
+
+    frequent = df_queries['calls'] > 10
+
+    # Check for common performance issues, one column-wide scan per pattern
+    masks = [
+        contains(queries, SELECT_STAR_PATTERN),
+        contains(queries, LIKE_WILDCARD_PATTERN),
+        has['ORDER BY'] & ~has['LIMIT'] & frequent,
+        has['JOIN'] & ~has['ON'],
+        has['OR'] & ~has['INDEX'] & ~has['UNION'],
+        (df_queries['avg_ms'] > 100) & ~has['WHERE'] & ~has['JOIN'] & frequent,
+    ]
+    M = np.column_stack([m.to_numpy(dtype=bool) for m in masks])
+
+    flagged = np.flatnonzero(M.any(axis=1))
+    # Truncate long queries for better readability
+    truncated_queries = truncate_text(queries.iloc[flagged], 200)
+
+    for i, truncated_query in zip(flagged, truncated_queries):
+        analysis = [QUERY_SUGGESTIONS[k] for k in np.flatnonzero(M[i])]
+        suggestions.append({
+            'query': truncated_query,
+            'calls': df_queries['calls'].iat[i],
+            'avg_ms': f"{df_queries['avg_ms'].iat[i]:.2f}",
+            'suggestions': '\n'.join(f"  - {s}" for s in analysis)
+        })
     
     return suggestions
 
@@ -52,244 +132,310 @@ def analyze_table_sizes(df_tables):
         return suggestions
         
     # Check for large tables without primary keys
-    large_tables = df_tables[df_tables['table_size_mb'] > 100]  # Tables > 100MB
-    for _, row in large_tables.iterrows():
-        if 'pkey' not in row['indexes'].lower():
+    if 'indexes' in df_tables.columns:
+        large_tables = df_tables[df_tables['table_size_mb'] > 100]  # Tables > 100MB
+        no_pkey_mask = ~large_tables['indexes'].str.lower().str.contains('pkey', regex=False, na=False)
+        for row in large_tables[no_pkey_mask].itertuples(index=False):
             suggestions.append(
-                f"🔑 **Missing Primary Key**: Table `{row['schema_name']}.{row['table_name']}` is large ({row['table_size_mb']:.2f}MB) "
+                f"🔑 **Missing Primary Key**: Table `{row.schema_name}.{row.table_name}` is large ({row.table_size_mb:.2f}MB) "
                 f"but has no primary key. Consider adding one to improve query performance."
             )
     
     # Check for tables with many indexes
     if 'index_count' in df_tables.columns:
         high_index_tables = df_tables[df_tables['index_count'] > 5]  # More than 5 indexes
-        for _, row in high_index_tables.iterrows():
+        for row in high_index_tables.itertuples(index=False):
             suggestions.append(
-                f"📊 **Multiple Indexes**: Table `{row['schema_name']}.{row['table_name']}` has {row['index_count']} indexes. "
+                f"📊 **Multiple Indexes**: Table `{row.schema_name}.{row.table_name}` has {row.index_count} indexes. "
                 f"Consider consolidating or removing unused indexes to reduce write overhead."
             )
     
     return suggestions
 
+def find_latest_csvs(raw_data_dir):
+    """Return the newest raw CSV or Parquet path per file prefix, scanning the directory once."""
+    latest = {}
+    if not os.path.isdir(raw_data_dir):
+        return latest
+    # File names embed a zero-padded timestamp, so the lexicographic max is
+    # also the most recent one.
+    with os.scandir(raw_data_dir) as it:
+        for entry in it:
+            name = entry.name
+            if not name.endswith(('.csv', '.parquet')):
+                continue
+            for prefix in RAW_READ_OPTIONS:
+                if name.startswith(prefix):
+                    if prefix not in latest or name > latest[prefix]:
+                        latest[prefix] = name
+                    break
+    return {prefix: os.path.join(raw_data_dir, name) for prefix, name in latest.items()}
+
+# Each render_* function takes the mapping of raw file prefixes to pending
+# pd.read_csv futures built by generate_report and returns its section as
+# markdown text.
+def render_query_analysis(frames, top_n):
+    """Render the query performance and optimization recommendation sections."""
+    parts = []
+    if 'query_stats_' in frames:
+        parts.append("## 1. Query Performance Analysis\n\n")
+        try:
+            df_queries = frames['query_stats_'].result()
+            if not df_queries.empty:
+                # Basic query stats
+                parts.append(f"### Top {top_n} Queries by Total Execution Time\n\n")
+                
+                # Format the queries for better readability
+                display_queries = df_queries.head(top_n).copy()
+                display_queries['query'] = truncate_text(display_queries['query'], 100)
+                
+                parts.append(to_markdown_table(display_queries[['query', 'calls', 'total_ms', 'avg_ms', 'min_ms', 'max_ms']]))
+                parts.append("\n\n")
+                
+                # Add summary statistics
+                parts.append("### Query Performance Summary\n\n")
+                parts.append(f"- Total queries collected: {len(df_queries)}\n")
+                parts.append(f"- Total execution time: {df_queries['total_ms'].sum()/1000:.2f} seconds\n")
+                parts.append(f"- Average query time: {df_queries['avg_ms'].mean():.2f} ms\n")
+                parts.append(f"- Slowest query: {df_queries['max_ms'].max():.2f} ms\n\n")
+                
+                # Generate optimization suggestions
+                parts.append("## 2. Optimization Recommendations\n\n")
+                
+                # Query pattern analysis
+                query_suggestions = analyze_query_patterns(df_queries)
+                if query_suggestions:
+                    parts.append("### Query Optimization Opportunities\n\n")
+                    parts.append("The following queries might benefit from optimization:\n\n")
+                    for i, suggestion in enumerate(query_suggestions[:10], 1):  # Limit to top 10
+                        parts.append(f"{i}. **Query**: `{suggestion['query']}`\n")
+                        parts.append(f"   - **Calls**: {suggestion['calls']}")
+                        parts.append(f" | **Avg Time**: {suggestion['avg_ms']} ms\n")
+                        parts.append(f"{suggestion['suggestions']}\n\n")
+                else:
+                    parts.append("No obvious query optimization opportunities detected.\n\n")
+                
+            else:
+                parts.append("No query statistics data found or pg_stat_statements is not enabled/populated.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing query stats: {e}\n\n")
+    else:
+        parts.append("## 1. Query Performance Analysis\n\nNo query statistics data found.\n\n")
+
+    return ''.join(parts)
+
+def render_table_analysis(frames):
+    """Render the largest tables and table optimization suggestions."""
+    parts = []
+    parts.append("## 3. Table Analysis\n\n")
+    if 'table_sizes_' in frames:
+        try:
+            df_tables = frames['table_sizes_'].result()
+            if not df_tables.empty:
+                # Show largest tables
+                parts.append("### Largest Tables\n\n")
+                top_tables = df_tables.nlargest(10, 'table_size_mb')
+                parts.append(to_markdown_table(
+                    top_tables[['schema_name', 'table_name', 'table_size_mb']]
+                    .rename(columns={'schema_name': 'Schema', 'table_name': 'Table', 'table_size_mb': 'Size (MB)'})
+                ))
+                
+                # Table optimization suggestions
+                table_suggestions = analyze_table_sizes(df_tables)
+                if table_suggestions:
+                    parts.append("\n### Table Optimization Opportunities\n\n")
+                    for suggestion in table_suggestions[:5]:  # Limit to top 5 table suggestions
+                        parts.append(f"- {suggestion}\n")
+                
+            else:
+                parts.append("No table size data available.\n")
+        except Exception as e:
+            parts.append(f"Error processing table sizes: {e}\n")
+    else:
+        parts.append("No table size data files found.\n")
+
+    return ''.join(parts)
+
+def render_resource_usage(frames):
+    """Render database and background writer statistics."""
+    parts = []
+    parts.append("\n## 4. Resource Usage Analysis\n\n")
+    if 'db_stats_' in frames:
+        try:
+            df_db_stats = frames['db_stats_'].result()
+            if len(df_db_stats):
+                parts.append("### Database Statistics\n\n")
+                # Add cache hit ratio analysis
+                if 'cache_hit_ratio' in df_db_stats.columns:
+                    cache_ratio = float(df_db_stats['cache_hit_ratio'].iat[0])
+                    parts.append(f"- **Cache Hit Ratio**: {cache_ratio:.2f}%\n")
+                    if cache_ratio < 90:
+                        parts.append("  - ⚠️ **Low cache hit ratio**. Consider increasing shared_buffers if you have available RAM.\n")
+                    else:
+                        parts.append("  - ✅ Good cache hit ratio.\n")
+                
+                # Add more resource metrics if available
+                if 'database_size_mb' in df_db_stats.columns:
+                    db_size = float(df_db_stats['database_size_mb'].iat[0])
+                    parts.append(f"- **Database Size**: {db_size:,.2f} MB\n")
+                
+                parts.append("\n")
+                parts.append("\n\n")
+            else:
+                parts.append("No database statistics data found.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing DB stats: {e}\n\n")
+    
+        parts.append("No database statistics data found.\n\n")
+
+    if 'bgwriter_stats_' in frames:
+        try:
+            df_bgwriter_stats = frames['bgwriter_stats_'].result()
+            if not df_bgwriter_stats.empty:
+                parts.append("### Background Writer Statistics\n\n")
+                parts.append(df_bgwriter_stats.to_markdown(index=False))
+                parts.append("\n\n")
+            else:
+                parts.append("No background writer statistics data found.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing BGWriter stats: {e}\n\n")
+    else:
+        parts.append("No background writer statistics data found.\n\n")
+
+    return ''.join(parts)
+
+def render_connection_info(frames):
+    """Render connection state totals and the oldest active connections."""
+    parts = []
+    parts.append("## 3. Connection Information\n\n")
+    if 'connection_info_' in frames:
+        try:
+            df_conn = frames['connection_info_'].result()
+            if not df_conn.empty:
+                state_counts = df_conn['state'].value_counts()
+                parts.append(f"Total active connections: {state_counts.get('active', 0)}\n")
+                parts.append(f"Total idle connections: {state_counts.get('idle', 0)}\n")
+                parts.append(f"Total idle in transaction connections: {state_counts.get('idle in transaction', 0)}\n\n")
+                parts.append("Top 10 Active Connections (by query start time):\n\n")
+                active_conns = df_conn.loc[df_conn['state'] == 'active']
+                parts.append(active_conns.nsmallest(10, 'query_start').to_markdown(index=False))
+                parts.append("\n\n")
+            else:
+                parts.append("No connection information found.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing connection info: {e}\n\n")
+    else:
+        parts.append("No connection information found.\n\n")
+
+    return ''.join(parts)
+
+def render_lock_info(frames):
+    """Render lock totals and the waiting locks."""
+    parts = []
+    parts.append("## 4. Lock Information\n\n")
+    if 'lock_info_' in frames:
+        try:
+            df_locks = frames['lock_info_'].result()
+            if not df_locks.empty:
+                granted_mask = df_locks['granted']
+                waiting_locks = df_locks.loc[~granted_mask]
+                parts.append(f"Total active locks: {len(df_locks)}\n")
+                parts.append(f"Total granted locks: {int(granted_mask.sum())}\n")
+                parts.append(f"Total waiting locks: {len(waiting_locks)}\n\n")
+                if not waiting_locks.empty:
+                    parts.append("Waiting Locks:\n\n")
+                    parts.append(waiting_locks.to_markdown(index=False))
+                    parts.append("\n\n")
+                else:
+                    parts.append("No waiting locks identified.\n\n")
+            else:
+                parts.append("No lock information found.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing lock info: {e}\n\n")
+    else:
+        parts.append("No lock information found.\n\n")
+
+    return ''.join(parts)
+
+def render_table_sizes(frames):
+    """Render the raw table and index size listing."""
+    parts = []
+    parts.append("## 5. Table and Index Sizes\n\n")
+    if 'table_sizes_' in frames:
+        try:
+            df_table_sizes = frames['table_sizes_'].result()
+            if not df_table_sizes.empty:
+                parts.append("Largest Tables by Total Size:\n\n")
+                # The collector stores raw byte counts, already ordered by total size
+                # table_size_mb is derived for the analysis section; list the raw columns only
+                listing = df_table_sizes.head(10).drop(columns='table_size_mb', errors='ignore')
+                parts.append(listing.to_markdown(index=False))
+                parts.append("\n\n")
+            else:
+                parts.append("No table size information found.\n\n")
+        except Exception as e:
+            parts.append(f"Error processing table sizes: {e}\n\n")
+    else:
+        parts.append("No table size information found.\n\n")
+
+    return ''.join(parts)
+
+def read_raw_csv(prefix, path):
+    """Parse one raw metric CSV or Parquet file, adding the columns derived from it."""
+    options = RAW_READ_OPTIONS[prefix]
+    if path.endswith('.parquet'):
+        # Written by the collector with raw_format = parquet; the column types
+        # are stored in the file, so only the report's own dtypes are applied
+        df = pd.read_parquet(path, columns=options.get('usecols'))
+        if 'dtype' in options:
+            df = df.astype(options['dtype'])
+    else:
+        df = pd.read_csv(path, **options)
+    # Both table sections share this frame, so derive the size in MB once here
+    if prefix == 'table_sizes_' and 'total_size_bytes' in df.columns:
+        df['table_size_mb'] = df['total_size_bytes'] / (1024 * 1024)
+    return df
+
 def generate_report(config):
-    raw_data_dir = os.path.join(os.path.dirname(__file__), '..', config['collection']['output_dir_raw'])
-    report_dir = os.path.join(os.path.dirname(__file__), '..', config['collection']['report_dir'])
+    raw_data_dir = os.path.join(PROJECT_ROOT, config['collection']['output_dir_raw'])
+    report_dir = os.path.join(PROJECT_ROOT, config['collection']['report_dir'])
     os.makedirs(report_dir, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_filename = os.path.join(report_dir, f"performance_report_{timestamp}.md")
 
-    with open(report_filename, 'w', encoding='utf-8') as f:
-        f.write(f"# PostgreSQL Performance Analysis Report - {timestamp}\n\n")
-        f.write("This report provides performance metrics and optimization suggestions for your PostgreSQL database.\n\n")
-
-        # --- Query Performance Analysis ---
-        query_stats_files = sorted(glob.glob(os.path.join(raw_data_dir, "query_stats_*.csv")))
-        if query_stats_files:
-            latest_query_stats_file = query_stats_files[-1]
-            f.write("## 1. Query Performance Analysis\n\n")
-            try:
-                df_queries = pd.read_csv(latest_query_stats_file)
-                if not df_queries.empty:
-                    # Basic query stats
-                    top_n = int(config['analysis'].get('top_n_queries', 10))
-                    f.write(f"### Top {top_n} Queries by Total Execution Time\n\n")
-                    
-                    # Format the queries for better readability
-                    display_queries = df_queries.head(top_n).copy()
-                    display_queries['query'] = display_queries['query'].apply(
-                        lambda x: x[:100] + '...' if len(x) > 100 else x
-                    )
-                    
-                    f.write(display_queries[['query', 'calls', 'total_ms', 'avg_ms', 'min_ms', 'max_ms']].to_markdown(index=False))
-                    f.write("\n\n")
-                    
-                    # Add summary statistics
-                    f.write("### Query Performance Summary\n\n")
-                    f.write(f"- Total queries collected: {len(df_queries)}\n")
-                    f.write(f"- Total execution time: {df_queries['total_ms'].sum()/1000:.2f} seconds\n")
-                    f.write(f"- Average query time: {df_queries['avg_ms'].mean():.2f} ms\n")
-                    f.write(f"- Slowest query: {df_queries['max_ms'].max():.2f} ms\n\n")
-                    
-                    # Generate optimization suggestions
-                    f.write("## 2. Optimization Recommendations\n\n")
-                    
-                    # Query pattern analysis
-                    query_suggestions = analyze_query_patterns(df_queries)
-                    if query_suggestions:
-                        f.write("### Query Optimization Opportunities\n\n")
-                        f.write("The following queries might benefit from optimization:\n\n")
-                        for i, suggestion in enumerate(query_suggestions[:10], 1):  # Limit to top 10
-                            f.write(f"{i}. **Query**: `{suggestion['query']}`\n")
-                            f.write(f"   - **Calls**: {suggestion['calls']}")
-                            f.write(f" | **Avg Time**: {suggestion['avg_ms']} ms\n")
-                            f.write(f"{suggestion['suggestions']}\n\n")
-                    else:
-                        f.write("No obvious query optimization opportunities detected.\n\n")
-                    
-                else:
-                    f.write("No query statistics data found or pg_stat_statements is not enabled/populated.\n\n")
-            except Exception as e:
-                f.write(f"Error processing query stats: {e}\n\n")
-        else:
-            f.write("## 1. Query Performance Analysis\n\nNo query statistics data found.\n\n")
-
-        # --- Table Analysis ---
-        f.write("## 3. Table Analysis\n\n")
-        table_size_files = sorted(glob.glob(os.path.join(raw_data_dir, "table_sizes_*.csv")))
-        if table_size_files:
-            latest_table_size_file = table_size_files[-1]
-            try:
-                df_tables = pd.read_csv(latest_table_size_file)
-                if not df_tables.empty:
-                    # Show largest tables
-                    f.write("### Largest Tables\n\n")
-                    df_tables['table_size_mb'] = df_tables['total_size_bytes'] / (1024 * 1024)
-                    top_tables = df_tables.nlargest(10, 'table_size_mb')
-                    f.write(top_tables[['schema_name', 'table_name', 'table_size_mb']]
-                           .rename(columns={'schema_name': 'Schema', 'table_name': 'Table', 'table_size_mb': 'Size (MB)'})
-                           .to_markdown(index=False, floatfmt=".2f"))
-                    
-                    # Table optimization suggestions
-                    table_suggestions = analyze_table_sizes(df_tables)
-                    if table_suggestions:
-                        f.write("\n### Table Optimization Opportunities\n\n")
-                        for suggestion in table_suggestions[:5]:  # Limit to top 5 table suggestions
-                            f.write(f"- {suggestion}\n")
-                    
-                else:
-                    f.write("No table size data available.\n")
-            except Exception as e:
-                f.write(f"Error processing table sizes: {e}\n")
-        else:
-            f.write("No table size data files found.\n")
-            
-        # --- Resource Usage Analysis ---
-        f.write("\n## 4. Resource Usage Analysis\n\n")
-        db_stats_files = sorted(glob.glob(os.path.join(raw_data_dir, "db_stats_*.csv")))
-        if db_stats_files:
-            latest_db_stats_file = db_stats_files[-1]
-            try:
-                df_db_stats = pd.read_csv(latest_db_stats_file)
-                if not df_db_stats.empty:
-                    f.write("### Database Statistics\n\n")
-                    # Add cache hit ratio analysis
-                    if 'cache_hit_ratio' in df_db_stats.columns:
-                        cache_ratio = df_db_stats['cache_hit_ratio'].iloc[0]
-                        f.write(f"- **Cache Hit Ratio**: {cache_ratio:.2f}%\n")
-                        if cache_ratio < 90:
-                            f.write("  - ⚠️ **Low cache hit ratio**. Consider increasing shared_buffers if you have available RAM.\n")
-                        else:
-                            f.write("  - ✅ Good cache hit ratio.\n")
-                    
-                    # Add more resource metrics if available
-                    if 'database_size_mb' in df_db_stats.columns:
-                        db_size = df_db_stats['database_size_mb'].iloc[0]
-                        f.write(f"- **Database Size**: {db_size:,.2f} MB\n")
-                    
-                    f.write("\n")
-                    f.write("\n\n")
-                else:
-                    f.write("No database statistics data found.\n\n")
-            except Exception as e:
-                f.write(f"Error processing DB stats: {e}\n\n")
-        
-            f.write("No database statistics data found.\n\n")
-
-        bgwriter_stats_files = sorted(glob.glob(os.path.join(raw_data_dir, "bgwriter_stats_*.csv")))
-        if bgwriter_stats_files:
-            latest_bgwriter_stats_file = bgwriter_stats_files[-1]
-            try:
-                df_bgwriter_stats = pd.read_csv(latest_bgwriter_stats_file)
-                if not df_bgwriter_stats.empty:
-                    f.write("### Background Writer Statistics\n\n")
-                    f.write(df_bgwriter_stats.to_markdown(index=False))
-                    f.write("\n\n")
-                else:
-                    f.write("No background writer statistics data found.\n\n")
-            except Exception as e:
-                f.write(f"Error processing BGWriter stats: {e}\n\n")
-        else:
-            f.write("No background writer statistics data found.\n\n")
-
-
-        # --- Connection Information ---
-        f.write("## 3. Connection Information\n\n")
-        conn_info_files = sorted(glob.glob(os.path.join(raw_data_dir, "connection_info_*.csv")))
-        if conn_info_files:
-            latest_conn_info_file = conn_info_files[-1]
-            try:
-                df_conn = pd.read_csv(latest_conn_info_file)
-                if not df_conn.empty:
-                    f.write(f"Total active connections: {len(df_conn[df_conn['state'] == 'active'])}\n")
-                    f.write(f"Total idle connections: {len(df_conn[df_conn['state'] == 'idle'])}\n")
-                    f.write(f"Total idle in transaction connections: {len(df_conn[df_conn['state'] == 'idle in transaction'])}\n\n")
-                    f.write("Top 10 Active Connections (by query start time):\n\n")
-                    # Convert to datetime objects for sorting
-                    df_conn['query_start'] = pd.to_datetime(df_conn['query_start'])
-                    f.write(df_conn[df_conn['state'] == 'active'].sort_values(by='query_start', ascending=True).head(10).to_markdown(index=False))
-                    f.write("\n\n")
-                else:
-                    f.write("No connection information found.\n\n")
-            except Exception as e:
-                f.write(f"Error processing connection info: {e}\n\n")
-        else:
-            f.write("No connection information found.\n\n")
-
-        # --- Lock Information ---
-        f.write("## 4. Lock Information\n\n")
-        lock_info_files = sorted(glob.glob(os.path.join(raw_data_dir, "lock_info_*.csv")))
-        if lock_info_files:
-            latest_lock_info_file = lock_info_files[-1]
-            try:
-                df_locks = pd.read_csv(latest_lock_info_file)
-                if not df_locks.empty:
-                    f.write(f"Total active locks: {len(df_locks)}\n")
-                    f.write(f"Total granted locks: {len(df_locks[df_locks['granted'] == True])}\n")
-                    f.write(f"Total waiting locks: {len(df_locks[df_locks['granted'] == False])}\n\n")
-                    if not df_locks[df_locks['granted'] == False].empty:
-                        f.write("Waiting Locks:\n\n")
-                        f.write(df_locks[df_locks['granted'] == False].to_markdown(index=False))
-                        f.write("\n\n")
-                    else:
-                        f.write("No waiting locks identified.\n\n")
-                else:
-                    f.write("No lock information found.\n\n")
-            except Exception as e:
-                f.write(f"Error processing lock info: {e}\n\n")
-        else:
-            f.write("No lock information found.\n\n")
-
-        # --- Table and Index Sizes ---
-        f.write("## 5. Table and Index Sizes\n\n")
-        table_sizes_files = sorted(glob.glob(os.path.join(raw_data_dir, "table_sizes_*.csv")))
-        if table_sizes_files:
-            latest_table_sizes_file = table_sizes_files[-1]
-            try:
-                df_table_sizes = pd.read_csv(latest_table_sizes_file)
-                if not df_table_sizes.empty:
-                    f.write("Largest Tables by Total Size:\n\n")
-                    # For sorting, convert size strings to bytes if needed. For simplicity here, assume pretty print is just for display.
-                    # Or just sort by table_size string directly which might not be numerically correct for `pg_size_pretty`.
-                    # For a real solution, you'd store raw bytes and convert for display.
-                    # As a workaround, if `pg_size_pretty` uses K, M, G, you could define a custom sort key.
-                    # For this PoC, we'll just display.
-                    f.write(df_table_sizes.head(10).to_markdown(index=False))
-                    f.write("\n\n")
-                else:
-                    f.write("No table size information found.\n\n")
-            except Exception as e:
-                f.write(f"Error processing table sizes: {e}\n\n")
-        else:
-            f.write("No table size information found.\n\n")
+    # Parse all raw files concurrently; pandas' C tokenizer releases the GIL.
+    # Each section collects its own result, so a bad file still only fails
+    # that section.
+    latest = find_latest_csvs(raw_data_dir)
+    with ThreadPoolExecutor(max_workers=max(len(latest), 1)) as executor:
+        frames = {
+            prefix: executor.submit(read_raw_csv, prefix, path)
+            for prefix, path in latest.items()
+        }
+
+    parts = []
+    parts.append(f"# PostgreSQL Performance Analysis Report - {timestamp}\n\n")
+    parts.append("This report provides performance metrics and optimization suggestions for your PostgreSQL database.\n\n")
 
-        f.write("\n---\n*End of Report*")
+    top_n = int(config['analysis'].get('top_n_queries', 10))
+    parts.append(render_query_analysis(frames, top_n))
+    parts.append(render_table_analysis(frames))
+    parts.append(render_resource_usage(frames))
+    parts.append(render_connection_info(frames))
+    parts.append(render_lock_info(frames))
+    parts.append(render_table_sizes(frames))
+
+    parts.append("\n---\n*End of Report*")
+
+    with open(report_filename, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
     print(f"Report generated: {report_filename}")
 
 
 def main():
     config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
+    config_path = os.path.join(PROJECT_ROOT, 'config', 'config.ini')
     config.read(config_path)
     generate_report(config)
 
@@ -1,27 +1,94 @@
 # scripts/collect_metrics.py
 import psycopg2
+import psycopg2.pool
+import atexit
 import configparser
+import functools
 import os
 import csv
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import chain
 from datetime import datetime
 
-def get_db_connection(config):
-    """Establishes a connection to the PostgreSQL database."""
-    try:
-        conn = psycopg2.connect(
-            host=config['postgresql']['host'],
-            port=config['postgresql']['port'],
-            database=config['postgresql']['database'],
-            user=config['postgresql']['user'],
-            password=config['postgresql']['password'],
-            connect_timeout=5
-        )
-        return conn
-    except psycopg2.Error as e:
-        print(f"Error connecting to database: {e}")
-        return None
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa = None
+
+# Repository root; data, report and config paths are resolved against it.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Column names of the query stats CSV, in the order the collector returns them
+QUERY_STATS_HEADER = ('query', 'calls', 'total_ms', 'avg_ms', 'min_ms', 'max_ms', 'avg_seconds')
+
+# Names of the statements prepared on each open connection
+_prepared_statements = weakref.WeakKeyDictionary()
+
+# Connections shared by the collectors, opened on first use
+_pool = None
+
+def get_connection_pool(config):
+    """Returns the shared connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        try:
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                1, 8,
+                host=config['postgresql']['host'],
+                port=config['postgresql']['port'],
+                database=config['postgresql']['database'],
+                user=config['postgresql']['user'],
+                password=config['postgresql']['password'],
+                connect_timeout=5
+            )
+        except psycopg2.Error as e:
+            print(f"Error connecting to database: {e}")
+            return None
+        atexit.register(_pool.closeall)
+    return _pool
 
-def collect_query_stats(conn, config):
+# Total calls recorded by pg_stat_statements (skipping the query text file),
+# and the number of other client backends in this database running a
+# statement right now; a call is only recorded once its statement finishes
+CAPTURE_PROGRESS_SQL = """
+    SELECT
+        (SELECT coalesce(sum(calls), 0) FROM pg_stat_statements(false)),
+        (SELECT count(*) FROM pg_stat_activity
+         WHERE state = 'active'
+            AND pid <> pg_backend_pid()
+            AND datname = current_database()
+            AND backend_type = 'client backend')
+"""
+
+def execute_prepared(cur, name, sql, params=()):
+    """Executes sql through a server-side prepared statement.
+
+    The statement is prepared the first time it runs on a connection; later
+    runs on that connection skip parsing and planning. params are bound to
+    the statement's $1, $2, ... placeholders.
+    """
+    prepared = _prepared_statements.setdefault(cur.connection, set())
+    if name not in prepared:
+        # PREPARE survives a rollback, so record it before EXECUTE can fail;
+        # otherwise a retry on this connection would try to prepare it again
+        cur.execute(f"PREPARE {name} AS {sql}")
+        prepared.add(name)
+    if params:
+        cur.execute(f"EXECUTE {name}({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+def collect_query_stats(conn, config, background=()):
+    """Captures pg_stat_statements for the configured window and returns the top queries.
+
+    background holds futures of collectors running on other connections; the
+    early-end baseline is taken once they finish so their own statements are
+    not mistaken for workload.
+    """
     try:
         with conn.cursor() as cur:
             # Check if pg_stat_statements extension is enabled
@@ -31,78 +98,113 @@ def collect_query_stats(conn, config):
                 return []
 
             # Get capture duration from config, default to 60 seconds
-            capture_duration = int(config.get('collection', {}).get('capture_duration_seconds', 60))
+            capture_duration = config.getint('collection', 'capture_duration_seconds', fallback=60)
+            # Stop early once queries were seen and then went quiet this long
+            idle_seconds = config.getint('collection', 'capture_idle_seconds', fallback=5)
+            # Longer query texts are cut on the server; 0 keeps the full text
+            max_query_length = config.getint('collection', 'query_text_max_length', fallback=0)
             
             print("\n=== Query Collection Started ===")
+            # Every run starts from a reset, so counters from an earlier run
+            # can never be reused and nothing is cached between runs
             print("1. First, we'll reset the query statistics")
             cur.execute("SELECT pg_stat_statements_reset()")
             
             print(f"2. Now, please run your application queries for the next {capture_duration} seconds...")
             print("   (This gives you time to trigger the custom queries you want to profile)")
             print("   Press Ctrl+C to stop early if you've run your queries\n")
-            
+
+            # Poll in autocommit mode: inside one transaction pg_stat_activity
+            # would keep returning the snapshot taken by the first poll
+            conn.commit()
+            conn.autocommit = True
             try:
-                # Wait for the configured duration to capture queries
+                # Wait for the configured duration to capture queries, polling the
+                # total call count (without reading query texts) and the running
+                # statements to notice when the workload has finished
+                wait(background)
+                cur.execute(CAPTURE_PROGRESS_SQL)
+                last_calls = cur.fetchone()[0]
+                seen_activity = False
+                quiet_for = 0
                 for i in range(capture_duration, 0, -1):
                     print(f"\rTime remaining: {i} seconds (or press Ctrl+C to stop) ", end="")
                     time.sleep(1)
+                    cur.execute(CAPTURE_PROGRESS_SQL)
+                    calls, running = cur.fetchone()
+                    # Every poll records one call of its own; a long statement
+                    # still running keeps the capture open until it is recorded
+                    if calls - last_calls > 1 or running:
+                        seen_activity = True
+                        quiet_for = 0
+                    else:
+                        quiet_for += 1
+                    last_calls = calls
+                    if idle_seconds and seen_activity and quiet_for >= idle_seconds:
+                        print(f"\n\nNo new queries for {idle_seconds} seconds, ending capture early.", end="")
+                        break
                 print("\n")
             except KeyboardInterrupt:
                 print("\n\nCapture stopped early. Processing collected data...\n")
+            finally:
+                conn.autocommit = False
             
             # Get the top 100 queries by total execution time
-            cur.execute("""
+            execute_prepared(cur, 'top_queries', """
                 SELECT
-                    query,
+                    CASE
+                        WHEN $1 > 0 AND length(query) > $1 THEN left(query, $1) || '...'
+                        ELSE query
+                    END as query,
                     calls,
-                    ROUND(total_exec_time::numeric, 2) as total_ms,
-                    ROUND(mean_exec_time::numeric, 2) as avg_ms,
-                    ROUND(min_exec_time::numeric, 2) as min_ms,
-                    ROUND(max_exec_time::numeric, 2) as max_ms,
-                    ROUND((total_exec_time / NULLIF(calls, 0) / 1000)::numeric, 4) as avg_seconds
+                    ROUND(total_exec_time::numeric, 2)::float8 as total_ms,
+                    ROUND(mean_exec_time::numeric, 2)::float8 as avg_ms,
+                    ROUND(min_exec_time::numeric, 2)::float8 as min_ms,
+                    ROUND(max_exec_time::numeric, 2)::float8 as max_ms,
+                    ROUND((total_exec_time / NULLIF(calls, 0) / 1000)::numeric, 4)::float8 as avg_seconds
                 FROM
                     pg_stat_statements
                 WHERE
-                    -- Exclude PostgreSQL internal queries and system tables
-                    query NOT LIKE '%pg_%' 
-                    AND query NOT LIKE '%information_schema%'
-                    AND query NOT LIKE '%pg_catalog%'
+                    -- Only statements run against this database (cheap integer test first)
+                    dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
                     -- Include only SELECT, INSERT, UPDATE, DELETE queries
-                    AND (
-                        query ILIKE 'SELECT%' 
-                        OR query ILIKE 'INSERT%' 
-                        OR query ILIKE 'UPDATE%' 
-                        OR query ILIKE 'DELETE%'
-                    )
+                    AND query ~* '^(SELECT|INSERT|UPDATE|DELETE)'
+                    -- Exclude PostgreSQL internal queries and system tables
+                    -- (one scan; covers pg_catalog too)
+                    AND query !~ '(pg_|information_schema)'
                 ORDER BY
                     total_exec_time DESC
-                LIMIT 100;
-            """)
+                LIMIT 100
+            """, (max_query_length,))
             return cur.fetchall()
     except psycopg2.Error as e:
         print(f"Error collecting query stats: {e}")
         return []
 
+def run_collector(pool, collector, *args):
+    """Runs a collector on its own pooled connection so it can overlap with others."""
+    conn = pool.getconn()
+    try:
+        return collector(conn, *args)
+    finally:
+        pool.putconn(conn)
+
 def collect_database_stats(conn):
     """Collects basic database statistics."""
     try:
         with conn.cursor() as cur:
-            # Get cache hit ratio
-            cur.execute("""
+            # Get cache hit ratio and database size in a single round trip
+            execute_prepared(cur, 'database_stats', """
                 SELECT
-                    ROUND((blks_hit * 100.0) / NULLIF((blks_read + blks_hit), 0), 2) AS cache_hit_ratio
+                    ROUND((blks_hit * 100.0) / NULLIF((blks_read + blks_hit), 0), 2)::float8 AS cache_hit_ratio,
+                    pg_database_size(datname) AS database_size
                 FROM
                     pg_stat_database
                 WHERE
-                    datname = current_database();
-            """)
-            cache_hit_ratio = cur.fetchone()[0] or 0
-            
-            # Get database size
-            cur.execute("""
-                SELECT pg_size_pretty(pg_database_size(current_database()))
+                    datname = current_database()
             """)
-            db_size = cur.fetchone()[0]
+            cache_hit_ratio, db_size = cur.fetchone()
+            cache_hit_ratio = cache_hit_ratio or 0
             
             return {
                 "cache_hit_ratio": cache_hit_ratio,
@@ -110,114 +212,281 @@ def collect_database_stats(conn):
             }
     except psycopg2.Error as e:
         print(f"Error collecting database stats: {e}")
-        return {"cache_hit_ratio": 0, "database_size": "N/A"}
+        return {"cache_hit_ratio": 0, "database_size": None}
+
 
 
 
 
+def collect_table_sizes(conn, filename):
+    """Streams sizes of user tables and their indexes straight into a CSV file.
 
-def collect_table_sizes(conn):
-    """Collects sizes of user tables and their indexes."""
+    The rows go from the server to disk through COPY without being turned
+    into Python objects. Sizes are recomputed on every run: relfilenode only
+    changes when a table is rewritten, not as it grows, so it cannot key a
+    cache. Returns the CSV path, or None on failure.
+    """
+    filepath = output_path(filename)
+    # COPY into a temporary name so a failed or interrupted stream never leaves
+    # a truncated CSV behind under the final name
+    partial_path = filepath + '.part'
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    n.nspname as schema_name,
-                    c.relname as table_name,
-                    pg_size_pretty(pg_relation_size(c.oid)) as table_size,
-                    pg_size_pretty(pg_total_relation_size(c.oid)) as total_size,
-                    pg_size_pretty(pg_indexes_size(c.oid)) as index_size,
-                    pg_size_pretty(pg_total_relation_size(c.oid) - pg_relation_size(c.oid) - pg_indexes_size(c.oid)) as toast_size
-                FROM
-                    pg_class c
-                LEFT JOIN 
-                    pg_namespace n ON n.oid = c.relnamespace
-                WHERE 
-                    c.relkind = 'r'
-                    AND n.nspname NOT IN ('pg_catalog', 'information_schema')
-                    AND n.nspname !~ '^pg_toast'
-                ORDER BY 
-                    pg_total_relation_size(c.oid) DESC;
-            """)
-            return cur.fetchall()
+        with conn.cursor() as cur, open(partial_path, 'wb', buffering=1 << 20) as f:
+            cur.copy_expert("""
+                COPY (
+                    -- Each size function runs once per table; the toast size
+                    -- and the sort order are derived from the computed values.
+                    -- Sizes stay in raw bytes and are formatted for display
+                    -- by pretty_size().
+                    WITH sizes AS (
+                        SELECT
+                            n.nspname as schema_name,
+                            c.relname as table_name,
+                            pg_relation_size(c.oid) as table_size_bytes,
+                            pg_total_relation_size(c.oid) as total_size_bytes,
+                            pg_indexes_size(c.oid) as index_size_bytes
+                        FROM
+                            pg_class c
+                        JOIN
+                            pg_namespace n ON n.oid = c.relnamespace
+                        WHERE
+                            c.relkind = 'r'
+                            -- Filter system schemas by oid while scanning pg_class,
+                            -- before any size functions run
+                            AND c.relnamespace NOT IN (
+                                SELECT oid FROM pg_namespace
+                                WHERE nspname IN ('pg_catalog', 'information_schema')
+                                    OR nspname LIKE 'pg\\_toast%'
+                            )
+                    )
+                    SELECT
+                        schema_name,
+                        table_name,
+                        table_size_bytes,
+                        total_size_bytes,
+                        index_size_bytes,
+                        total_size_bytes - table_size_bytes - index_size_bytes as toast_size_bytes
+                    FROM
+                        sizes
+                    ORDER BY
+                        total_size_bytes DESC
+                ) TO STDOUT WITH CSV HEADER
+            """, f)
+        os.replace(partial_path, filepath)
+        print(f"Report saved to {filepath}")
+        return filepath
     except psycopg2.Error as e:
         print(f"Error collecting table sizes: {e}")
-        return []
+        return None
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def output_path(filename):
+    """Returns the path for an output file, creating the reports directory."""
+    filepath = os.path.join(PROJECT_ROOT, 'reports', filename)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    return filepath
+
+def sync_reports_dir():
+    """Persists the entries of all files written to the reports directory with one fsync."""
+    try:
+        fd = os.open(os.path.join(PROJECT_ROOT, 'reports'), os.O_RDONLY)
+    except OSError:
+        return  # Missing directory, or a platform that can't open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def pretty_size(num_bytes):
+    """Formats a byte count for display, like pg_size_pretty.
+
+    Missing sizes (None, or the empty CSV field COPY writes for NULL when a
+    table is dropped mid-scan) are shown as N/A.
+    """
+    if num_bytes is None or num_bytes == '':
+        return 'N/A'
+    size = int(num_bytes)
+    if abs(size) < 1024:
+        return f"{size} bytes"
+    size /= 1024
+    for unit in ('kB', 'MB', 'GB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def iter_csv_rows(filepath):
+    """Yields the data rows of a CSV file written by the collectors, one at a time."""
+    with open(filepath, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header
+        yield from reader
+
+def to_arrow_table(data, header):
+    """Builds a pyarrow Table from collected rows, one column per header name."""
+    columns = zip(*data) if data else ([] for _ in header)
+    return pa.table(dict(zip(header, map(list, columns))))
 
 def save_to_csv(data, filename, header):
     """Saves collected data to a CSV file."""
-    filepath = os.path.join(os.path.dirname(__file__), '..', 'reports', filename)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    filepath = output_path(filename)
     try:
-        with open(filepath, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(header)
-            writer.writerows(data)
+        if pa is not None:
+            # Arrow's C writer handles the per-cell quoting instead of csv.writer
+            table = to_arrow_table(data, header)
+            pa_csv.write_csv(table, filepath, write_options=pa_csv.WriteOptions(batch_size=8192))
+        else:
+            with open(filepath, 'w', newline='', buffering=1 << 20) as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(data)
         print(f"Report saved to {filepath}")
     except IOError as e:
         print(f"Error saving report: {e}")
 
+def save_to_parquet(data, filename, header):
+    """Saves collected data to a zstd-compressed Parquet file. Requires pyarrow."""
+    filepath = output_path(filename)
+    try:
+        # Dictionary encoding stores each repeated query text only once
+        pa_parquet.write_table(
+            to_arrow_table(data, header), filepath, compression='zstd', use_dictionary=True
+        )
+        print(f"Report saved to {filepath}")
+    except (IOError, pa.ArrowException) as e:
+        print(f"Error saving report: {e}")
+
+def save_raw_data(data, name, timestamp, header, raw_format):
+    """Saves collected rows as CSV, or as Parquet when configured and pyarrow is available."""
+    if raw_format == 'parquet' and pa is not None:
+        save_to_parquet(data, f"{name}_{timestamp}.parquet", header)
+    else:
+        save_to_csv(data, f"{name}_{timestamp}.csv", header)
+
+# Keeps query text inside a single markdown table cell
+MARKDOWN_CELL_TRANS = str.maketrans({'|': '│', '\n': ' ', '\r': ' '})
+
+def truncate_query(query, max_len=100):
+    """Makes query text safe for a markdown table cell and cuts it to max_len characters."""
+    query = query.translate(MARKDOWN_CELL_TRANS)
+    return query[:max_len] + '...' if len(query) > max_len else query
+
 def generate_markdown_report(query_stats, db_stats, table_sizes, timestamp):
     """Generates a markdown report with the collected metrics."""
-    report_path = os.path.join(os.path.dirname(__file__), '..', 'reports', f'performance_report_{timestamp}.md')
+    report_path = os.path.join(PROJECT_ROOT, 'reports', f'performance_report_{timestamp}.md')
     os.makedirs(os.path.dirname(report_path), exist_ok=True)
     
-    with open(report_path, 'w') as f:
+    with open(report_path, 'w', buffering=1 << 20) as f:
         # Database Summary
         f.write("# Database Performance Report\n\n")
         f.write(f"Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
-        f.write("## Database Summary\n")
-        f.write(f"- **Database Size:** {db_stats['database_size']}\n")
-        f.write(f"- **Cache Hit Ratio:** {db_stats['cache_hit_ratio']}%\n\n")
+        if db_stats:
+            f.write("## Database Summary\n")
+            f.write(f"- **Database Size:** {pretty_size(db_stats['database_size'])}\n")
+            f.write(f"- **Cache Hit Ratio:** {db_stats['cache_hit_ratio']:.2f}%\n\n")
         
         # Query Performance
         if query_stats:
             f.write("## Top Slow Queries\n")
             f.write("| Query | Calls | Total Time (ms) | Avg (ms) | Min (ms) | Max (ms) |\n")
             f.write("|-------|-------|----------------|----------|----------|----------|\n")
-            for row in query_stats:
-                query = row[0].replace('|', '│')  # Replace pipe in query to avoid markdown issues
-                query = query[:100] + '...' if len(query) > 100 else query
-                f.write(f"| `{query}` | {row[1]} | {row[2]} | {row[3]} | {row[4]} | {row[5]} |\n")
+            f.writelines(
+                f"| `{truncate_query(row[0])}` | {row[1]} | {row[2]:.2f} | {row[3]:.2f} | {row[4]:.2f} | {row[5]:.2f} |\n"
+                for row in query_stats
+            )
             f.write("\n")
         
-        # Table Sizes
-        if table_sizes:
+        # Table Sizes (an iterator, so peek at the first row to skip empty sections)
+        first_table = next(table_sizes, None)
+        if first_table is not None:
             f.write("## Table Sizes\n")
             f.write("| Schema | Table | Table Size | Total Size | Index Size | TOAST Size |\n")
             f.write("|--------|-------|------------|------------|------------|------------|\n")
-            for row in table_sizes:
-                f.write(f"| {row[0]} | {row[1]} | {row[2]} | {row[3]} | {row[4]} | {row[5]} |\n")
+            f.writelines(
+                f"| {row[0]} | {row[1]} | {' | '.join(map(pretty_size, row[2:6]))} |\n"
+                for row in chain([first_table], table_sizes)
+            )
     
     print(f"Generated report: {report_path}")
 
-def main():
-    config = configparser.ConfigParser()
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.ini')
+# Collectors run in the background, keyed by their metrics_to_collect name:
+# (progress message, callable taking the connection and the run timestamp)
+BACKGROUND_COLLECTORS = {
+    'resource_usage': (
+        "Collecting database statistics...",
+        lambda conn, timestamp: collect_database_stats(conn),
+    ),
+    'table_sizes': (
+        "Collecting table size information...",
+        lambda conn, timestamp: collect_table_sizes(conn, f"table_sizes_{timestamp}.csv"),
+    ),
+}
+
+SUPPORTED_METRICS = frozenset(BACKGROUND_COLLECTORS) | {'query_stats'}
+
+@functools.lru_cache(maxsize=1)
+def load_config(config_path):
+    """Reads and parses config.ini once; later runs in the same process reuse it.
+
+    Call load_config.cache_clear() to pick up edits to the file.
+    """
+    config = configparser.ConfigParser(inline_comment_prefixes=('#',))
     config.read(config_path)
+    return config
+
+def main():
+    config = load_config(os.path.join(PROJECT_ROOT, 'config', 'config.ini'))
     
     print("Starting database performance analysis...")
+
+    wanted = frozenset(
+        m.strip() for m in config.get('collection', 'metrics_to_collect', fallback=','.join(SUPPORTED_METRICS)).split(',')
+    )
+    unsupported = wanted - SUPPORTED_METRICS - {''}
+    if unsupported:
+        print(f"Skipping metrics this collector does not support: {', '.join(sorted(unsupported))}")
+
+    raw_format = config.get('collection', 'raw_format', fallback='csv').strip().lower()
+    if raw_format == 'parquet' and pa is None:
+        print("Parquet output needs pyarrow; saving raw data as CSV instead.")
     
-    conn = get_db_connection(config)
-    if not conn:
+    pool = get_connection_pool(config)
+    if not pool:
         print("Failed to connect to the database. Check your configuration in config.ini")
         return
+    conn = pool.getconn()
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     try:
-        # Collect database statistics
-        print("Collecting database statistics...")
-        db_stats = collect_database_stats(conn)
-        
-        # Collect query statistics
-        print("Collecting query performance data...")
-        query_stats = collect_query_stats(conn, config)
-        
-        # Collect table sizes
-        print("Collecting table size information...")
-        table_sizes = collect_table_sizes(conn)
+        # Database and table statistics don't depend on the query capture
+        # window, so collect them on their own pooled connections in the background.
+        # Query stats stay on the main thread so Ctrl+C can end the capture.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {}
+            for name, (message, collector) in BACKGROUND_COLLECTORS.items():
+                if name in wanted:
+                    print(message)
+                    futures[name] = executor.submit(run_collector, pool, collector, timestamp)
+
+            query_stats = None
+            if 'query_stats' in wanted:
+                print("Collecting query performance data...")
+                query_stats = collect_query_stats(conn, config, list(futures.values()))
+
+            results = {name: future.result() for name, future in futures.items()}
+
+        db_stats = results.get('resource_usage')
+        table_sizes_file = results.get('table_sizes')
+
+        # Stream the rows back while writing the report so memory stays flat
+        # no matter how many relations the database has
+        table_sizes = iter_csv_rows(table_sizes_file) if table_sizes_file else iter(())
         
         # Generate report
         print("Generating report...")
@@ -225,23 +494,15 @@ def main():
         
         # Save raw data for reference
         if query_stats:
-            save_to_csv(
-                query_stats, 
-                f"query_stats_{timestamp}.csv",
-                ['query', 'calls', 'total_ms', 'avg_ms', 'min_ms', 'max_ms', 'avg_seconds']
-            )
-            
-        if table_sizes:
-            save_to_csv(
-                table_sizes,
-                f"table_sizes_{timestamp}.csv",
-                ['schema', 'table_name', 'table_size', 'total_size', 'index_size', 'toast_size']
-            )
+            save_raw_data(query_stats, 'query_stats', timestamp, QUERY_STATS_HEADER, raw_format)
+
+        # Files are closed without syncing each one; sync the directory once
+        sync_reports_dir()
             
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
-        conn.close()
+        pool.putconn(conn)
         print("Analysis completed.")
 
 if __name__ == "__main__":